@@ -14,61 +14,148 @@
 #
 # execute evaluator:
 #   $ python evaluate_altafsir.py data/altafsir_out --min 4
+#   $ python evaluate_altafsir.py data/altafsir_out --min 4 --jobs 0
 #
 #########################################################################################################################################
 
 import os
 import re
 import sys
-from bs4 import BeautifulSoup
+from functools import partial
+from contextlib import nullcontext
+from html.parser import HTMLParser
 from argparse import ArgumentParser, FileType
+from concurrent.futures import ProcessPoolExecutor
 
 
 RM_NUM_REGEX = re.compile(r'\([0-9]+\)')
 
+CHUNK_SIZE = 1 << 16
+
+
+class QuranTagHandler(HTMLParser):
+    """ Streaming handler that only collects the text of quran tags.
+
+    The gold and tagged files are not well-formed xml (no root element,
+    unquoted attributes), so the lenient html tokeniser is used instead of expat.
+
+    """
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack = [] # character data of the open quran tags, innermost last
+        self.quotes = set()
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'quran':
+            self.stack.append([])
+
+    def handle_endtag(self, tag):
+        if tag == 'quran' and self.stack:
+            self._add(self.stack.pop())
+
+    def handle_data(self, data):
+        for buf in self.stack:
+            buf.append(data)
+
+    def close(self):
+        super().close()
+        while self.stack:
+            self._add(self.stack.pop())
+
+    def _add(self, buf):
+        self.quotes.add(RM_NUM_REGEX.sub('', ''.join(buf).strip()))
+
+def quran_texts(path):
+    """ get the text of all quran tags in file.
+
+    Args:
+        path (str): path to gold or tagged xml file.
+
+    Return:
+        set: texts enclosed by quran tags, with verse numbers removed.
+
+    """
+    handler = QuranTagHandler()
+    with open(path) as fp:
+        while chunk := fp.read(CHUNK_SIZE):
+            handler.feed(chunk)
+    handler.close()
+    return handler.quotes
+
+def score_pair(paths, min_words=None):
+    """ compare the quran quotes of a gold file with those of its tagged file.
+
+    Args:
+        paths (dict): {"gold": gold_path, "tagged": tagged_path}
+        min_words (int): minimum number of words in a quote to be compared.
+
+    Return:
+        tuple: correct, not_found, false_positive, long_not_found, long_false_positive
+
+    """
+    gold_quotes = quran_texts(paths['gold'])
+    tagg_quotes = quran_texts(paths['tagged'])
+
+    if min_words:
+        gold_quotes = set(s for s in gold_quotes if len(s.split())>=min_words)
+        tagg_quotes = set(s for s in tagg_quotes if len(s.split())>=min_words)
+
+    correct, not_found, false_positive = 0, 0, 0
+    long_not_found, long_false_positive = 0, 0 #FIXME files with high amount of failures
+
+    # check if all the quran marked in altafsir is included in the tagged text
+    # precision
+    for text in gold_quotes:
+        if text in tagg_quotes:
+            correct += 1
+        else:
+            not_found += 1
+            if len(text.split())>5: #FIXME
+                long_not_found += 1
+
+    #recall
+    for text in tagg_quotes:
+        if text not in gold_quotes:
+            false_positive += 1
+            if len(text.split())>6: #FIXME
+                long_false_positive += 1
+
+    return correct, not_found, false_positive, long_not_found, long_false_positive
+
 if __name__ == '__main__':
 
     parser = ArgumentParser(description='check accuracy of tagger against selected corpus from altafsir')
     parser.add_argument('dir', help='directory containing results of tagger and gold standard')
     parser.add_argument('--min', type=int, required=False, help='minimum number of words in match to compare')
+    parser.add_argument('--jobs', type=int, default=1, help='number of worker processes to compare the files with (0 for all cpus) [DEFAULT = 1]')
     args = parser.parse_args()
 
+    # {basename: {"gold": path, "tagged": path}}
+    pairs = {}
+    for fo in os.scandir(args.dir):
+        stem, ext = os.path.splitext(fo.name)
+        base, _, kind = stem.rpartition('.')
+        if ext == '.xml' and kind in ('gold', 'tagged'):
+            pairs.setdefault(base, {})[kind] = fo.path
+
+    # only files with both a gold and a tagged version can be compared
+    pairs = {fn: paths for fn, paths in pairs.items() if len(paths) == 2}
+
     correct, not_found, false_positive = 0, 0, 0
 
     aux, aux2 = {}, {} #FIXME files with high amount of failures
-    for fp in set(os.path.splitext(fo.path)[0].rsplit('.', 1)[0] for fo in os.scandir(args.dir)):
-        
-        with open(f'{fp}.gold.xml') as goldfp, open(f'{fp}.tagged.xml') as taggfp:
-
-            fn = os.path.basename(fp)
-
-            #if fn != 'altafsir-9-84-56-13-26': #DEBUG
-            #    continue #DEBUG
-
-            # check if all the quran marked in altafsir is included in the tagged text
-
-            gold_quotes = set(RM_NUM_REGEX.sub('', tag.text.strip()) for tag in BeautifulSoup(goldfp.read(), 'lxml').find_all('quran'))
-            tagg_quotes = set(RM_NUM_REGEX.sub('', tag.text.strip()) for tag in BeautifulSoup(taggfp.read(), 'lxml').find_all('quran'))
-
-            if args.min:
-                gold_quotes = set(s for s in gold_quotes if len(s.split())>=args.min)
-                tagg_quotes = set(s for s in tagg_quotes if len(s.split())>=args.min)
-
-            # precision
-            for text in gold_quotes:
-                if text in tagg_quotes:
-                    correct += 1
-                else:
-                    not_found += 1
-                    if len(text.split())>5: #FIXME
-                        aux[fn] = aux.get(fn, 0)+1 #FIXME files with high amount of failures
-
-            #recall
-            for text in tagg_quotes:
-                if text not in gold_quotes:
-                    false_positive += 1
-                    if len(text.split())>6: #FIXME
-                        aux2[fn] = aux2.get(fn, 0)+1 #FIXME files with high amount of failures
+    # with a single job the pairs are scored in this process, without sending them to a worker
+    score = partial(score_pair, min_words=args.min)
+    with ProcessPoolExecutor(max_workers=args.jobs or None) if args.jobs != 1 else nullcontext() as executor:
+        scores = executor.map(score, pairs.values(), chunksize=32) if executor else map(score, pairs.values())
+        for fn, (c, nf, fp, long_nf, long_fp) in zip(pairs, scores):
+            correct += c
+            not_found += nf
+            false_positive += fp
+            if long_nf:
+                aux[fn] = long_nf #FIXME files with high amount of failures
+            if long_fp:
+                aux2[fn] = long_fp #FIXME files with high amount of failures
 
     print(f'correct        = {correct}')
     print(f'not found      = {not_found}')
@@ -11,7 +11,8 @@
 # The Quran tagger uses the tanzil Quran and the concept of archigraphemes develoed by Thomas Milo
 #
 # requirements:
-#   * depends on quran.json
+#   * depends on quran_simple.json (a pickled copy, quran_simple.pkl, is cached on first run)
+#   * orjson or ujson are used to read json if installed
 #
 # TODO
 # ----
@@ -25,6 +26,9 @@
 #   $ echo وَلَنَبْلُوَنَّكُمْ حَتَّىٰ نَعْلَمَ ٱلْمُجَاهِدِينَ مِنكُمْ وَٱلصَّابِرِينَ وَنَبْلُوَ | tr ' ' '\n' | grep . | jq -R -n -c '[inputs]' | python quran_tagger.py
 #   $ python quran_tagger.py --min 2 <(echo '["نرينك","بعض"]')
 #   $ echo "نرينك بعض" | tr ' ' '\n' | grep . | jq -R -n -c '[inputs]' | python quran_tagger.py --min 2
+#   $ echo "نرينك بعض" | tr ' ' '\n' | grep . | jq -R -c . | python quran_tagger.py --jsonl --min 2
+#   $ find data/altafsir_tok -type f -name "*.json" | python quran_tagger.py --batch --min 3
+#   $ find data/altafsir_tok -type f -name "*.json" | python quran_tagger.py --batch --jobs 0 --min 3
 #
 #   $ echo وَلَنَبْلُوَنَّكُمْ حَتَّىٰ نَعْلَمَ ٱلْمُجَاهِدِينَ ب وَلَنَبْلُوَنَّكُمْ حَتَّىٰ نَعْلَمَ وَلَنَبْلُوَنَّكُمْ حَتَّىٰ نَعْلَمَ | tr ' ' '\n' | grep . | jq -R -n -c '[inputs]' | python quran_tagger.py --min 2
 #   $ echo فقال تعالى: إِلاَّ أَن تَكُونَ تِجَٰرَةً عَن تَرَاضٍ مِّنْكُمْ فلا بأس | tr ' ' '\n' | grep . | jq -R -n -c '[inputs]' | python quran_tagger.py --min 3
@@ -37,10 +41,22 @@
 import os
 import re
 import sys
-import ujson as json
+import pickle
+from array import array
+from collections import deque
+from functools import lru_cache, partial
+try:
+    import orjson
+except ModuleNotFoundError:
+    orjson = None
+try:
+    import ujson as json
+except ModuleNotFoundError:
+    import json
 from argparse import ArgumentParser, FileType
+from concurrent.futures import ProcessPoolExecutor
 
-from util import normalise, rasm, check_ellipsis, last_token_of_sura_or_aya
+from util import normalise_and_rasm_batch, check_ellipsis, pack_index, last_token_of_sura_or_aya
 
 
 RED='\033[1;31m' #DEBUG
@@ -51,16 +67,110 @@ SAFE_LENGTH = 5
 
 _MY_PATH = os.path.dirname(os.path.abspath(__file__))
 
-with open(os.path.join(_MY_PATH, 'quran_simple.json')) as quranfp:
-    QURAN = json.load(quranfp)
+def load_json(fp):
+    """ read json document from file, with orjson if installed.
+
+    Args:
+        fp (io.TextIOWrapper): pointer to json file.
+
+    Return:
+        object: deserialised json document.
+
+    """
+    if orjson:
+        return orjson.loads(fp.read())
+    return json.load(fp)
+
+def load_jsonl(fp):
+    """ read json lines document from file, one json document per line, with orjson if installed.
+
+    Args:
+        fp (io.TextIOWrapper): pointer to json lines file.
+
+    Yields:
+        object: deserialised json document of each non-empty line.
+
+    """
+    loads = orjson.loads if orjson else json.loads
+    for line in fp:
+        if line.strip():
+            yield loads(line)
+
+_QURAN_PATH = os.path.join(_MY_PATH, 'quran_simple.json')
+_QURAN_CACHE_PATH = os.path.join(_MY_PATH, 'quran_simple.pkl')
+_QURAN_CACHE_VERSION = 11 # increase whenever the post-processing of QURAN changes
+
+def _load_quran(path=_QURAN_PATH, cache_path=_QURAN_CACHE_PATH):
+    """ load the quran structure and post-process it for tagger.
+
+    The pickled sidecar in cache_path contains the quran structure already post-processed, so it is
+    preferred over the json as long as it is newer than it and has the current cache version.
+    Otherwise, or if the sidecar cannot be read, the json is post-processed and the sidecar is written again.
+
+    Args:
+        path (str): path to the quran json file.
+        cache_path (str): path to the pickled sidecar.
+
+    Return:
+        dict: post-processed quran structure.
+
+    """
+    if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(path):
+        try:
+            with open(cache_path, 'rb') as quranfp:
+                cached = pickle.load(quranfp)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, IndexError, ValueError):
+            cached = None # corrupt or truncated sidecar, rebuild it from the json
+        if isinstance(cached, tuple) and cached[0] == _QURAN_CACHE_VERSION:
+            return cached[1]
+
+    with open(path) as quranfp:
+        quran = load_json(quranfp)
+
+    quran['qrasm'] = {k : tuple(d) for k, d in quran['qrasm'].items()}     # sorted quran offsets of each rasm
+    quran['qindex'] = [index for index, _ in quran['qtext']]               # [sura, aya, word] by token offset
+    quran['qpacked'] = [pack_index(*index) for index in quran['qindex']]  # sortable int of each quran index
+    quran['qori'] = [ori for _, (ori, norm) in quran['qtext']]             # original quran word by token offset
+    quran['qnorm'] = [norm for _, (ori, norm) in quran['qtext']]           # normalised quran word by token offset
+    del quran['qtext'] # split into the lists above, which are much faster to unpickle than the nested pairs
+
+    quran['norm_ids'] = {}                                                   # integer id of each normalised quran word
+    quran['qtnorm'] = array('i', [quran['norm_ids'].setdefault(n, len(quran['norm_ids'])) for n in quran['qnorm']])
+                                                                             # normalised word id by token offset
+    quran['rasm_ids'] = {r : i for i, r in enumerate(quran['qrasm'])}      # integer id of each quran rasm
+    quran['qrasm_by_id'] = list(quran['qrasm'].values())                    # sorted quran offsets of each rasm id
+    quran['qtrasm'] = array('i', [-2]) * (len(quran['qnorm'])+1)           # rasm id of quran word by token offset, ending with
+    for r, positions in quran['qrasm'].items():                             # a -2 sentinel that does not match any text word
+        for pos in positions:
+            quran['qtrasm'][pos] = quran['rasm_ids'][r]
+    quran['qbigrams'] = {}                                                    # sorted quran offsets of each pair of consecutive
+    for pos in range(len(quran['qnorm'])-1):                                # rasm ids, by (first_id, second_id)
+        quran['qbigrams'].setdefault((quran['qtrasm'][pos], quran['qtrasm'][pos+1]), []).append(pos)
+    quran['qbigrams'] = {k : tuple(d) for k, d in quran['qbigrams'].items()}
+
+    # write to a temporary file in the same directory and rename it, so that a concurrent import
+    # or an interrupted write never sees a partial sidecar
+    tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_path, 'wb') as cachefp:
+            pickle.dump((_QURAN_CACHE_VERSION, quran), cachefp, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+    return quran
+
+QURAN = _load_quran()
 
 #with open(os.path.join(_MY_PATH, 'stopwords.json')) as fp:
 #    STOPWORDS = set([rasm(normalise(w)) for w in json.load(fp)])
 with open(os.path.join(_MY_PATH, 'stopwords2.json')) as fp:
-    STOPWORDS = set(json.load(fp))
+    STOPWORDS = set(load_json(fp))
 
-
-QURAN['qrasm'] = {k : set(d) for k, d in QURAN['qrasm'].items()}
+QURAN['stopword_ids'] = frozenset(QURAN['rasm_ids'][r] for r in STOPWORDS if r in QURAN['rasm_ids']) # rasm ids of the stopwords
 
 
 class TokensError(Exception):
@@ -69,12 +179,56 @@ class TokensError(Exception):
     """
     pass
 
+def _scan_chains(text_ids, quran_ids, quran_positions, quran_bigrams, seed_lengths, nstarts, text_norm_ids=None, quran_norm_ids=None):
+    """ find the chains of consecutive words that match between the text and the quran.
+
+    As no chain shorter than its seed length is returned, the candidates of each text offset are taken
+    from the rarest pair of consecutive words among its first seed length words (or from its first word
+    if the seed length is 1), shifted back to where the chain would start in the quran.
+
+    Args:
+        text_ids (list): rasm id of each word of the text (-1 if not in the quran).
+        quran_ids (array): rasm id of each word of the quran, followed by a sentinel id.
+        quran_positions (list): sorted quran offsets of each rasm id.
+        quran_bigrams (dict): sorted quran offsets of each pair of consecutive rasm ids.
+        seed_lengths (list): shortest chain to return from each text offset.
+        nstarts (int): number of text offsets to look for chains from.
+        text_norm_ids (array): normalised word id of each word of the text (-1 if not in the quran).
+            If given, chains whose words do not also match in their normalised form are discarded.
+        quran_norm_ids (array): normalised word id of each word of the quran.
+
+    Yields:
+        tuple: (text_offset, quran_offset, chain_length) of each chain, sorted by text offset
+            and then by quran offset.
+
+    """
+    text_size = len(text_ids)
+    for i in range(nstarts):
+        seed_length = seed_lengths[i]
+        seed = text_ids[i:i+seed_length]
+        if len(seed) < seed_length or -1 in seed:
+            continue
+        if seed_length == 1:
+            k, quran_starts = 0, quran_positions[seed[0]]
+        else:
+            k, quran_starts = min(((k, quran_bigrams.get((seed[k], seed[k+1]), ())) for k in range(seed_length-1)),
+                                  key=lambda candidates: len(candidates[1]))
+        if k:
+            quran_starts = (pos-k for pos in quran_starts if pos >= k and quran_ids[pos-k] == seed[0])
+
+        for iquran in quran_starts:
+            j = 1
+            while i+j < text_size and text_ids[i+j] == quran_ids[iquran+j]:
+                j += 1
+            if j >= seed_length and (text_norm_ids is None or text_norm_ids[i:i+j] == quran_norm_ids[iquran:iquran+j]):
+                yield i, iquran, j
+
 def tagger(words, qstruct=QURAN, min_tokens=MIN_TOKENS, safe_length=SAFE_LENGTH, rasm_match=False, include_ellipses=True, debug=False):
     """ tag words with quranic quotations.
 
     Args:
-        words (list): text as a list of words.
-        qstruct (dict): quran structure.
+        words (iterable): text as a list of words, or any iterable of words (e.g. streamed from a file).
+        qstruct (dict): quran structure, as post-processed at import.
         min_tokens (int): minimum number of non-stopword words to accept as a match.
         safe_length (int): minimum number of words to accept as a match regardless their nature.
         rasm_match (bool): accept pure rasm matches.
@@ -100,69 +254,64 @@ def tagger(words, qstruct=QURAN, min_tokens=MIN_TOKENS, safe_length=SAFE_LENGTH,
     if min_tokens <= 0:
         raise TokensError('The minimum number of words must be at least 1')
 
-    words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-    end_of_chains = dict() # { end_offset : { chain_length : [(start_offset, quran_start_offset), ...], ... }, ...}
-    ellipses = dict() # { end_offset : False/"ila"/"ila qawl"/"ila qawl tacala"/"ila akhir sura"/"ila akhir aya"/"ila akhirha"} #FIXME ELLIPSIS
+    words_rasm = normalise_and_rasm_batch(words)
     nwords = len(words_rasm)
-
-    for i, (ori_tok, norm_tok, rasm_tok) in enumerate(words_rasm):
-
-        # stop searching when the remaining tokens are smaller than min_tokens
-        if i > nwords - min_tokens:
-            break
-
-        for iquran in qstruct['qrasm'].get(rasm_tok, set()):
-
-            if rasm_tok in STOPWORDS:   #FIXME stopwords
-                chain_rasm = set()      #FIXME stopwords
-            else:                       #FIXME stopwords
-                chain_rasm = {rasm_tok} #FIXME stopwords
-
-            chain_norm_text = [norm_tok]                        #FIXME last filtering
-            chain_norm_quran = [qstruct['qtext'][iquran][1][1]] #FIXME last filtering
-
-            j = 0
-            while i+j < nwords-1:
-                j += 1
-                next_word_rasm = words_rasm[i+j][2]
-                if not next_word_rasm in qstruct['qrasm'] or not iquran+j in qstruct['qrasm'][next_word_rasm]:
-                    break
-
-                if next_word_rasm not in STOPWORDS:  #FIXME stopwords
-                    chain_rasm.add(next_word_rasm)   #FIXME stopwords
-                
-                chain_norm_text.append(words_rasm[i+j][1])                #FIXME last filtering
-                chain_norm_quran.append(qstruct['qtext'][iquran+j][1][1]) #FIXME last filtering
-            else:
-                j+=1
-
-            # check whether there is an indication of ellipsis after the end of the quotation: #FIXME ELLIPSIS
-            if not i+j in ellipses:                                                            #FIXME ELLIPSIS
-                ellipses[i+j] = check_ellipsis(words_rasm, i+j, nwords, debug)                 #FIXME ELLIPSIS
-
-            if len(chain_rasm) >= min_tokens or j >= safe_length: #FIXME stopwords
-                
-                if rasm_match or ' '.join(chain_norm_text) == ' '.join(chain_norm_quran):  #FIXME last filtering
-
-                    j -= 1
-                    if not i+j in end_of_chains:
-                        end_of_chains[i+j] = {j+1: [(i, iquran)]}
-                    elif not j+1 in end_of_chains[i+j]:
-                        end_of_chains[i+j][j+1] = [(i, iquran)]
-                    else:
-                        end_of_chains[i+j][j+1].append((i, iquran))
-    
-    # keep only the longest token chain(s) for each endpoint:
-    filtered_longest = dict()
-    for end_i in end_of_chains.keys():
-        m = max(end_of_chains[end_i].keys())
-        filtered_longest[end_i] = end_of_chains[end_i][m]
+    best_len = [0] * nwords       # length of the longest chain(s) ending at each text offset
+    best_starts = [None] * nwords # [(start_offset, quran_start_offset), ...] of the longest chain(s) ending at each text offset
+    chain_ends = []               # end offsets with chains, in the order they are found
+    text_norms = [norm for _, norm, _ in words_rasm]
+    text_ids = [qstruct['rasm_ids'].get(r, -1) for _, _, r in words_rasm]
+    stopword_ids = qstruct['stopword_ids']
+
+    # unless pure rasm matches are accepted, the chains whose normalised words differ from the quran are discarded while scanning
+    text_norm_ids = None if rasm_match else array('i', [qstruct['norm_ids'].get(n, -1) for n in text_norms]) #FIXME last filtering
+
+    # a chain shorter than safe_length needs min_tokens different non-stopwords, so if the words following a text
+    # offset do not have them, only the chains reaching safe_length can be accepted from there
+    seed_lengths = [max(1, min(min_tokens, safe_length))] * nwords
+    if min_tokens < safe_length:
+        no_chain_ids = stopword_ids | {-1}
+        for i in range(nwords):
+            if len(set(text_ids[i:i+safe_length-1]) - no_chain_ids) < min_tokens:
+                seed_lengths[i] = safe_length
+
+    # stop searching when the remaining tokens are smaller than min_tokens
+    chains = _scan_chains(text_ids, qstruct['qtrasm'], qstruct['qrasm_by_id'], qstruct['qbigrams'], seed_lengths, nwords - min_tokens + 1,
+                          text_norm_ids, qstruct['qtnorm'])
+    for i, iquran, j in chains:
+
+        # the chains that start inside a longer chain accepted with the same end (typically its own suffixes
+        # along the same quran offsets) cannot be the longest for that end, so they are not checked again
+        if best_len[i+j-1] > j:
+            continue
+
+        # a chain shorter than min_tokens cannot contain min_tokens non-stopwords, so the set is only built when needed
+        # (all the words of a chain are in the quran, so their rasm ids stand for their rasms)
+        if j >= safe_length or (j >= min_tokens and len(set(text_ids[i:i+j]) - stopword_ids) >= min_tokens): #FIXME stopwords
+
+            # keep only the longest token chain(s) for each endpoint. As chains are found by increasing
+            # start offset, the first one found for an endpoint is the longest. The chains kept for an
+            # endpoint share their start and are found by increasing quran offset, so they stay sorted
+            end = i+j-1
+            if not best_len[end]:
+                best_len[end] = j
+                best_starts[end] = [(i, iquran)]
+                chain_ends.append(end)
+            elif j == best_len[end]:
+                best_starts[end].append((i, iquran))
+
+    # sweep the chains by start offset, the longest first when several chains start at the same word,
+    # comparing each one only with the last chain kept, as the ones kept before do not reach its start.
+    # The chains that lose an overlap are remembered with the chain that beat them, and put back if that
+    # one is removed later, so that a region does not lose its quotation when its winner is displaced.
+    # chain_ends is already sorted by start offset, so sorting it only reorders chains with the same start
+    filtered_longest = [(end, best_starts[end]) for end in sorted(chain_ends, key=lambda end: (best_starts[end][0][0], -end))]
 
     # filter out overlapping chains:
     if filtered_longest:
         
-        filtered_longest = sorted(filtered_longest.items(), key=lambda x: x[1])
         filtered_overlap = [filtered_longest[0]]
+        displaced = {} # {end: chains that lost an overlap against the kept chain ending at end}
         
         size = len(filtered_longest)
         for i, (end, group) in enumerate(filtered_longest[1:], 1):
@@ -177,9 +326,9 @@ def tagger(words, qstruct=QURAN, min_tokens=MIN_TOKENS, safe_length=SAFE_LENGTH,
                 curr_size = end - ini
                 
                 if curr_size > prev_size:
-                    filtered_overlap.pop()
+                    keep_prev, keep_curr = False, True
                 elif curr_size < prev_size:
-                    continue
+                    keep_prev, keep_curr = True, False
                 
                 # same length overlaps
                 else:
@@ -202,25 +351,22 @@ def tagger(words, qstruct=QURAN, min_tokens=MIN_TOKENS, safe_length=SAFE_LENGTH,
                     if not pre2_qini:
                         if not next_qini:
                             print('    skipped!!', file=sys.stderr) #TRACE #FIXME if there is no context, we skip the overlap!!
-                            filtered_overlap.pop()
-                            continue
+                            keep_prev, keep_curr = False, False
                         else:
                             diff_next_prev = abs(next_qini - prev_qini)
                             diff_next_curr = abs(next_qini - curr_qini)
                             if diff_next_prev < diff_next_curr:
-                                continue
+                                keep_prev, keep_curr = True, False
                             else:
-                                filtered_overlap.pop()
-                                filtered_overlap.append((end, group))
+                                keep_prev, keep_curr = False, True
                     else:
                         if not next_qini:
                             diff_pre2_prev = abs(pre2_qini - prev_qini)
                             diff_pre2_curr = abs(pre2_qini - curr_qini)
                             if diff_pre2_prev < diff_pre2_curr:
-                                continue
+                                keep_prev, keep_curr = True, False
                             else:
-                                filtered_overlap.pop()
-                                filtered_overlap.append((end, group))
+                                keep_prev, keep_curr = False, True
                         else:
                             diff_pre2_prev = abs(pre2_qini - prev_qini)
                             diff_pre2_curr = abs(pre2_qini - curr_qini)
@@ -229,28 +375,39 @@ def tagger(words, qstruct=QURAN, min_tokens=MIN_TOKENS, safe_length=SAFE_LENGTH,
 
                             if diff_pre2_prev < diff_pre2_curr:
                                 if diff_next_prev < diff_next_curr:
-                                    continue
+                                    keep_prev, keep_curr = True, False
                                 else:
                                     if diff_pre2_prev < diff_next_curr:
-                                        continue
+                                        keep_prev, keep_curr = True, False
                                     else:
-                                        filtered_overlap.pop()
-                                        filtered_overlap.append((end, group))
+                                        keep_prev, keep_curr = False, True
                             else:
                                 if diff_next_prev < diff_next_curr:
                                     if diff_pre2_curr < diff_next_prev:
-                                        filtered_overlap.pop()
-                                        filtered_overlap.append((end, group))
+                                        keep_prev, keep_curr = False, True
                                     else:
-                                        continue
+                                        keep_prev, keep_curr = True, False
                                 else:
-                                    filtered_overlap.pop()
-                                    filtered_overlap.append((end, group))
+                                    keep_prev, keep_curr = False, True
                     
                     #
                     # end resolve resolve same length overlap
                     #
 
+                if keep_prev:
+                    displaced.setdefault(prev_end, []).append((end, group))
+                    continue
+
+                # remove the previous chain and put back the chains it had beaten that end before the current one
+                prev = filtered_overlap.pop()
+                for lost_end, lost_group in displaced.pop(prev_end, []):
+                    if lost_end < ini and (not filtered_overlap or filtered_overlap[-1][0] < lost_group[0][0]):
+                        filtered_overlap.append((lost_end, lost_group))
+
+                if not keep_curr:
+                    continue
+                displaced.setdefault(end, []).append(prev)
+
             filtered_overlap.append((end, group))
     else:
         filtered_overlap = []
@@ -266,25 +423,27 @@ def tagger(words, qstruct=QURAN, min_tokens=MIN_TOKENS, safe_length=SAFE_LENGTH,
             print(f'        ori =  "{text_ori}"  norm =  "{text_norm}"', file=sys.stderr) #TRACE
 
         quran_ids = []
-        ellipsis = ellipses[text_end+1]
 
-        if include_ellipses and ellipsis:
+        # check whether there is an indication of ellipsis after the end of the quotation: #FIXME ELLIPSIS
+        # False/"ila"/"ila qawl"/"ila qawl tacala"/"ila akhir sura"/"ila akhir aya"/"ila akhirha"
+        ellipsis = include_ellipses and check_ellipsis(words_rasm, text_end+1, nwords, debug)
+
+        if ellipsis:
             ellipsis_tokens = len(ellipsis.split(" ")) # number of tokens the ellipsis takes up in the text (incl. end words of the quotation)
             
             #if ellipsis.startswith("ila akhir"):
             if re.findall("end_|kullaha", ellipsis):
 
-                for text_ini, quran_ini in sorted(starts):
+                for text_ini, quran_ini in starts:
                     quran_end = quran_ini + (text_end - text_ini)
-                    sura_no, aya_no, word_no = qstruct['qtext'][quran_end][0]
 
                     ell_q_end = None
                     #if ellipsis in ("ila akhirha", "ila akhir sura"):
                     if re.findall("end_.+ al_sura|end_.+_ha|al_sura kullaha|end_verb$", ellipsis):
-                        ell_q_end = last_token_of_sura_or_aya(qstruct['qtext'], quran_end, sura_no, "sura") 
+                        ell_q_end = last_token_of_sura_or_aya(qstruct['qpacked'], quran_end, "sura")
                     #elif ellipsis == "ila akhir aya":
                     elif re.findall("end_.+ al_aya|al_aya kullaha", ellipsis):
-                        ell_q_end = last_token_of_sura_or_aya(qstruct['qtext'], quran_end, aya_no, "aya")
+                        ell_q_end = last_token_of_sura_or_aya(qstruct['qpacked'], quran_end, "aya")
                     elif re.findall("end_.+sura_name", ellipsis):
                         sura_name_offsets = [i for i, word in enumerate(ellipsis.split(" ")) if word.startswith("sura_name")]
                         sura_name = words_rasm[text_end+1+sura_name_offsets[0]:text_end+1+sura_name_offsets[-1]+1][1]
@@ -294,8 +453,8 @@ def tagger(words, qstruct=QURAN, min_tokens=MIN_TOKENS, safe_length=SAFE_LENGTH,
                             pass
 
                     if ell_q_end:
-                        qindex_ini = qstruct['qtext'][quran_ini][0]
-                        qindex_end = qstruct['qtext'][ell_q_end][0]
+                        qindex_ini = qstruct['qindex'][quran_ini]
+                        qindex_end = qstruct['qindex'][ell_q_end]
                         quran_ids.append((qindex_ini, qindex_end, quran_ini, ell_q_end))
                 if quran_ids:
                     text_end += ellipsis_tokens
@@ -316,7 +475,7 @@ def tagger(words, qstruct=QURAN, min_tokens=MIN_TOKENS, safe_length=SAFE_LENGTH,
                 next_quotes = {end: filtered_overlap[end]  for end in next_quote_ends if s+1 in [x[0] for x in filtered_common[end]]}
 
                 if next_quotes:
-                    ell_end = max(next_quotes.keys())
+                    ell_end = max(next_quotes)
                     q_ellipsis_starts = sorted(next_quotes[ell_end]) # list of (text_ini, quran_ini) tuples
 
                 # if no Quran quotation that starts immediately after the ellipsis_tokens had been found already,
@@ -342,7 +501,7 @@ def tagger(words, qstruct=QURAN, min_tokens=MIN_TOKENS, safe_length=SAFE_LENGTH,
 
                     ell_sura_nos = dict()
                     for ell_ini, ell_q_ini in q_ellipsis_starts:
-                        ell_sura_no = qstruct['qtext'][ell_q_ini][0][0]
+                        ell_sura_no = qstruct['qindex'][ell_q_ini][0]
                         if not ell_sura_no in ell_sura_nos:
                             ell_sura_nos[ell_sura_no] = []
                         ell_sura_nos[ell_sura_no].append((ell_ini, ell_q_ini))
@@ -351,7 +510,7 @@ def tagger(words, qstruct=QURAN, min_tokens=MIN_TOKENS, safe_length=SAFE_LENGTH,
 
                     for _text_ini, quran_ini in starts:
                         quran_end = quran_ini + (text_end - text_ini)
-                        sura_no, aya_no, word_no = qstruct['qtext'][quran_end][0]
+                        sura_no, aya_no, word_no = qstruct['qindex'][quran_end]
                         if sura_no in ell_sura_nos:
                             # filter out the quotations that start after the end of the first part of the ellipsis:
                             #ell_ini, ell_q_ini = ell_sura_nos[sura_no][0]
@@ -359,8 +518,8 @@ def tagger(words, qstruct=QURAN, min_tokens=MIN_TOKENS, safe_length=SAFE_LENGTH,
                             if inis:
                                 ell_ini, ell_q_ini = inis[0]
                                 ell_q_end = ell_q_ini + (ell_end - ell_ini)
-                                qindex_ini = qstruct['qtext'][quran_ini][0]
-                                qindex_end = qstruct['qtext'][ell_q_end][0]
+                                qindex_ini = qstruct['qindex'][quran_ini]
+                                qindex_end = qstruct['qindex'][ell_q_end]
                                 quran_ids.append((qindex_ini, qindex_end, quran_ini, ell_q_end))
 
                     if quran_ids:
@@ -371,16 +530,20 @@ def tagger(words, qstruct=QURAN, min_tokens=MIN_TOKENS, safe_length=SAFE_LENGTH,
                             filtered_overlap = [elem for elem in filtered_overlap if elem[1]!=e] #FIXME
                         text_end = ell_end
 
-        for _, quran_ini in sorted(starts, key=lambda x: x[1]):
+        for _, quran_ini in starts:
+
+            # only the first quran sequence is kept, the rest are just shown when debugging
+            if quran_ids and not debug:
+                break
 
             quran_end = quran_ini + (text_end - text_ini)
 
-            qindex_ini = qstruct['qtext'][quran_ini][0]
-            qindex_end = qstruct['qtext'][quran_end][0]
+            qindex_ini = qstruct['qindex'][quran_ini]
+            qindex_end = qstruct['qindex'][quran_end]
 
             if debug:
-                quran_ori = ' '.join(w[0] for _, w in qstruct['qtext'][quran_ini:quran_end+1])
-                quran_norm = ' '.join(w[1] for _, w in qstruct['qtext'][quran_ini:quran_end+1])
+                quran_ori = ' '.join(qstruct['qori'][quran_ini:quran_end+1])
+                quran_norm = ' '.join(qstruct['qnorm'][quran_ini:quran_end+1])
                 print(f'@DEBUG@ qini={quran_ini}({qindex_ini})  qend={quran_end}({qindex_end})', file=sys.stderr) #TRACE
                 print(f'        qori = "{quran_ori}"  qnorm = "{quran_norm}"{RESET}', file=sys.stderr) #TRACE
         
@@ -390,6 +553,65 @@ def tagger(words, qstruct=QURAN, min_tokens=MIN_TOKENS, safe_length=SAFE_LENGTH,
         yield (text_ini, text_end), quran_ids
 
 
+@lru_cache(maxsize=128)
+def cached_tagger(words, min_tokens=MIN_TOKENS, safe_length=SAFE_LENGTH, rasm_match=False, include_ellipses=True):
+    """ tag words with quranic quotations, reusing the results of previous calls with the same arguments.
+
+    Meant for library use, where the same texts are tagged again and again. Batches of different files
+    hardly ever hit the cache, so they are better tagged with tagger or tag_batch.
+
+    Args:
+        words (tuple): text as a tuple of words.
+        min_tokens (int): minimum number of non-stopword words to accept as a match.
+        safe_length (int): minimum number of words to accept as a match regardless their nature.
+        rasm_match (bool): accept pure rasm matches.
+        include_ellipses (bool): take elliptical quotations into account.
+
+    Return:
+        tuple: results of tagger for words. They are shared between calls, so they must not be modified.
+
+    """
+    return tuple(tagger(list(words), min_tokens=min_tokens, safe_length=safe_length, rasm_match=rasm_match, include_ellipses=include_ellipses))
+
+
+_BATCH_AHEAD = 4 # texts submitted to each worker of tag_batch ahead of the results consumed
+
+def _tag_all(words, **kwargs):
+    """ run tagger to the end, so that the results can be sent back from a worker process.
+
+    """
+    return list(tagger(words, **kwargs))
+
+def tag_batch(docs, min_tokens=MIN_TOKENS, safe_length=SAFE_LENGTH, rasm_match=False, include_ellipses=True, jobs=None):
+    """ tag several texts with quranic quotations in parallel.
+
+    Args:
+        docs (iterable): texts, each of them as a list of words.
+        min_tokens (int): minimum number of non-stopword words to accept as a match.
+        safe_length (int): minimum number of words to accept as a match regardless their nature.
+        rasm_match (bool): accept pure rasm matches.
+        include_ellipses (bool): take elliptical quotations into account.
+        jobs (int): number of worker processes (number of cpus if None).
+
+    Yields:
+        list: results of tagger for each text, in the same order as docs.
+
+    """
+    tag = partial(_tag_all, min_tokens=min_tokens, safe_length=safe_length, rasm_match=rasm_match, include_ellipses=include_ellipses)
+
+    # only a few texts per worker are submitted ahead of the results consumed, so that a lazy docs
+    # (e.g. files read on demand) is not loaded all at once in the parent process
+    window = _BATCH_AHEAD * (jobs or os.cpu_count() or 1)
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for words in docs:
+            if len(pending) >= window:
+                yield pending.popleft().result()
+            pending.append(executor.submit(tag, words))
+        while pending:
+            yield pending.popleft().result()
+
+
 if __name__ == '__main__':
 
     parser = ArgumentParser(description='tag text with Quranic quotations')
@@ -399,13 +621,41 @@ if __name__ == '__main__':
     parser.add_argument('--safe', type=int, default=SAFE_LENGTH, help=f'minimum number of words to accept as a match regardless their nature [DEFAULT = {SAFE_LENGTH}]')
     parser.add_argument('--rasm', action='store_true', help='accept pure rasm matches')
     parser.add_argument('--ellipses', action='store_true', help='include ellipses')
+    parser.add_argument('--jsonl', action='store_true', help='input words are in json lines format, one json string per line')
+    parser.add_argument('--batch', action='store_true', help='infile contains a list of json files to tag, one path per line')
+    parser.add_argument('--jobs', type=int, default=1, help='number of worker processes to tag the files of --batch with (0 for all cpus) [DEFAULT = 1]')
     parser.add_argument('--debug', action='store_true', help='debug mode')
     args = parser.parse_args()
 
-    words = json.load(args.infile)
+    if args.batch:
+        inpaths = [l.strip() for l in args.infile if l.strip()]
+    else:
+        inpaths = [None]
+
+    def read_words(inpath):
+        load = (lambda fp: list(load_jsonl(fp))) if args.jsonl else load_json
+        if not inpath:
+            return load(args.infile)
+        with open(inpath) as infp:
+            return load(infp)
+
+    if args.debug and args.jobs != 1:
+        print('WARNING! --jobs is ignored in debug mode, the files are tagged one after the other', file=sys.stderr)
+
+    if args.batch and len(inpaths) > 1 and args.jobs != 1 and not args.debug:
+        all_results = tag_batch(map(read_words, inpaths), min_tokens=args.min, safe_length=args.safe, rasm_match=args.rasm,
+                                include_ellipses=args.ellipses, jobs=args.jobs or None)
+    else:
+        all_results = (tagger(read_words(inpath), min_tokens=args.min, safe_length=args.safe, rasm_match=args.rasm,
+                              include_ellipses=args.ellipses, debug=args.debug) for inpath in inpaths)
+
+    for inpath, results in zip(inpaths, all_results):
+
+        if inpath:
+            print(f'File: {inpath}', file=args.outfile)
 
-    for (word_ini, word_end), quranids in tagger(words, min_tokens=args.min, safe_length=args.safe, rasm_match=args.rasm, include_ellipses=args.ellipses, debug=args.debug):
-        print(f'Found! word_ini={word_ini} word_end={word_end}', file=args.outfile)
-        for qindex_ini, qindex_end, quran_ini, quran_end in quranids:
-            print(f'  quran_ini={qindex_ini}({quran_ini}) quran_end={qindex_end}({quran_end})', file=args.outfile)
+        for (word_ini, word_end), quranids in results:
+            print(f'Found! word_ini={word_ini} word_end={word_end}', file=args.outfile)
+            for qindex_ini, qindex_end, quran_ini, quran_end in quranids:
+                print(f'  quran_ini={qindex_ini}({quran_ini}) quran_end={qindex_end}({quran_end})', file=args.outfile)
 
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+#
+#    test_quran_tagger.py
+#
+# usage:
+#
+#   apply all tests:
+#     $ python test_quran_tagger.py
+#     $ python -m unittest test_quran_tagger
+#
+#   apply specific test
+#     $ python -m unittest test_quran_tagger.TestTagger
+#
+#################################################################################
+
+import io
+import unittest
+from contextlib import redirect_stderr
+
+from quran_tagger import tagger, cached_tagger, tag_batch, TokensError
+
+
+class TestTagger(unittest.TestCase):
+
+    def test_tagger_1(self):
+        r = list(tagger(['نرينك', 'بعض'], min_tokens=2))
+        self.assertEqual(r, [((0, 1), [([10, 46, 2], [10, 46, 3], 27306, 27307)])])
+
+    def test_tagger_2_vowels(self):
+        r = list(tagger('وَلَنَبْلُوَنَّكُمْ حَتَّىٰ نَعْلَمَ ٱلْمُجَاهِدِينَ مِنكُمْ وَٱلصَّابِرِينَ وَنَبْلُوَ'.split()))
+        self.assertEqual(r, [((0, 6), [([47, 31, 1], [47, 31, 7], 66273, 66279)])])
+
+    def test_tagger_3_inside_text(self):
+        r = list(tagger('فقال تعالى: إِلاَّ أَن تَكُونَ تِجَٰرَةً عَن تَرَاضٍ مِّنْكُمْ فلا بأس'.split(), min_tokens=3))
+        self.assertEqual(r, [((2, 9), [([4, 29, 10], [4, 29, 17], 10431, 10438)])])
+
+    def test_tagger_4_not_found(self):
+        self.assertEqual(list(tagger('هذا كلام لا علاقة له'.split())), [])
+
+    def test_tagger_5_empty(self):
+        self.assertEqual(list(tagger([])), [])
+
+    def test_tagger_6_min_tokens(self):
+        with self.assertRaises(TokensError):
+            list(tagger(['نرينك', 'بعض'], min_tokens=0))
+
+    def test_tagger_7_overlap(self):
+        # overlapping chains are resolved once, without repeating any of them
+        with redirect_stderr(io.StringIO()):
+            r = list(tagger(['إلى', 'في', 'ما', 'قال', 'رسول'], min_tokens=1, safe_length=1))
+        self.assertEqual([span for span, _ in r], [(0, 1), (2, 3), (4, 4)])
+        self.assertEqual(r, [((0, 1), [([28, 38, 13], [28, 38, 14], 50578, 50579)]),
+                             ((2, 3), [([23, 81, 4], [23, 81, 5], 44910, 44911)]),
+                             ((4, 4), [([2, 87, 19], [2, 87, 19], 1464, 1464)])])
+
+    def test_tagger_8_overlap_same_length(self):
+        # chains of the same length that overlap each other never reach the output together
+        with redirect_stderr(io.StringIO()):
+            r = list(tagger('المساجد لله والله'.split(), min_tokens=1, safe_length=1))
+        spans = [span for span, _ in r]
+        self.assertEqual(spans, sorted(spans))
+        self.assertTrue(all(prev_end < ini for (_, prev_end), (ini, _) in zip(spans, spans[1:])))
+
+    def test_tagger_9_overlap_displaced(self):
+        # a chain beaten in an overlap is put back when the chain that beat it is removed in turn
+        words = ['كلام', 'قال', 'من', 'ثم', 'في', 'إلى', 'قوله', 'لِّقَوْمٍ', 'يَعْقِلُونَ', 'قال', 'هذا']
+        with redirect_stderr(io.StringIO()):
+            r = list(tagger(words, min_tokens=2, safe_length=5))
+        self.assertIn(((7, 8), [([2, 164, 42], [2, 164, 43], 2962, 2963)]), r)
+
+class TestCached_tagger(unittest.TestCase):
+
+    def test_cached_tagger_1(self):
+        words = 'فقال تعالى: إِلاَّ أَن تَكُونَ تِجَٰرَةً عَن تَرَاضٍ مِّنْكُمْ فلا بأس'.split()
+        self.assertEqual(list(cached_tagger(tuple(words), min_tokens=3)), list(tagger(words, min_tokens=3)))
+
+    def test_cached_tagger_2_same_call(self):
+        words = ('نرينك', 'بعض')
+        self.assertIs(cached_tagger(words, min_tokens=2), cached_tagger(words, min_tokens=2))
+
+class TestTag_batch(unittest.TestCase):
+
+    def test_tag_batch_1(self):
+        docs = [['نرينك', 'بعض'], 'هذا كلام لا علاقة له'.split(), 'فقال تعالى: إِلاَّ أَن تَكُونَ تِجَٰرَةً عَن تَرَاضٍ مِّنْكُمْ فلا بأس'.split()]
+        self.assertEqual(list(tag_batch(docs, min_tokens=2, jobs=2)), [list(tagger(words, min_tokens=2)) for words in docs])
+
+if __name__ == '__main__':
+    unittest.main()
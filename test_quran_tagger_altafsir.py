@@ -13,6 +13,8 @@
 #     python test_quran_tagger_altafsir.py --min 3 --debug --gold data/altafsir_out/tiny_example_altafsir.gold.xml &> data/altafsir_out/tiny_example_altafsir.tagged.xml
 #   $ cat data/altafsir_in/altafsir-9-85-47-4-6.json |
 #     python test_quran_tagger_altafsir.py --min 3 --debug --gold data/altafsir_out/altafsir-9-85-47-4-6.gold.xml &> data/altafsir_out/altafsir-9-85-47-4-6.tagged.xml
+#   $ find data/altafsir_in -type f -name "*.json" |
+#     python test_quran_tagger_altafsir.py --batch --jobs 0 --min 3 --gold data/altafsir_out/all.gold.xml > data/altafsir_out/all.tagged.xml
 #   
 #   example with same length overlap (FIXME!! bad example, in Quran it is badalan, not al-badal, thus the mismatch):
 #   $ cat data/altafsir_in_500/altafsir-1-4-106-4-4.json | python test_quran_tagger_altafsir.py --min 3 --gold altafsir-1-4-106-4-4.gold.xml > altafsir-1-4-106-4-4.tagged.xml
@@ -43,63 +45,136 @@
 
 import re
 import sys
-import ujson as json
+from functools import partial
+from contextlib import nullcontext
 from argparse import ArgumentParser, FileType
+from concurrent.futures import ProcessPoolExecutor
 
-from quran_tagger import tagger, MIN_TOKENS
+from quran_tagger import tagger, load_json, MIN_TOKENS
 
 REGEX_COMPLETE_TAGS = re.compile(r'\{(.+?)\}')
+COMPLETE_TAGS_REPL = r'\n<quran>\n\1\n</quran>\n'
+
+
+def tag_altafsir(doc, min_tokens=MIN_TOKENS, rasm_match=False, include_ellipses=False, quiet=False, debug=False):
+    """ tag altafsir document according to its gold standard annotation and to the quran tagger.
+
+    Args:
+        doc (dict): altafsir document, with its text and its aya annotations.
+        min_tokens (int): minimum number of words accepted as a match.
+        rasm_match (bool): accept pure rasm matches.
+        include_ellipses (bool): include ellipses.
+        quiet (bool): do not indicate as attributes the quran indexes matched in the xml tag.
+        debug (bool): show debugging info.
+
+    Return:
+        str, str: text tagged according to the gold standard, text tagged according to the quran tagger.
+
+    """
+    # only the text and the aya annotations of the document are needed
+    doc_text, doc_ayas = doc['text'], doc['annotation']['aya']
+    del doc
+
+    text = doc_text[1:] #FIXME bug: the initial space should not be there
+
+    # insert the tags of the annotations in a single pass over the text. On the same offset, the tags of an
+    # annotation go after those of the previous ones, and the opening tag before the closing one.
+    # The complete tags are also added to each slice, as they cannot span the newlines of the tags inserted
+    insertions = []
+    for iann, ann in enumerate(doc_ayas):
+        insertions.append((ann['start'], iann, 0, "\n<quran>\n"))
+        insertions.append((ann['end'], iann, 1, "\n</quran>\n"))
+    insertions.sort()
+
+    parts = []
+    prev = 0
+    for offset, _, _, tag in insertions:
+        parts.append(REGEX_COMPLETE_TAGS.sub(COMPLETE_TAGS_REPL, text[prev:offset]))
+        parts.append(tag)
+        prev = offset
+    parts.append(REGEX_COMPLETE_TAGS.sub(COMPLETE_TAGS_REPL, text[prev:]))
 
-if __name__ == '__main__':
+    # text with annotations from altafsir
+    gold = ''.join(parts) + '\n'
+    del text, parts, insertions
 
-    parser = ArgumentParser(description='manual test for quranic tagger')
-    parser.add_argument('infile', nargs='?', type=FileType('r'), default=sys.stdin, help='altafsir file')
-    parser.add_argument('outfile', nargs='?', type=FileType('w'), default=sys.stdout, help='tagged text according to quran tagger')
-    parser.add_argument('--gold', type=FileType('w'), help='tagged text according to gold standard')
-    parser.add_argument('--min', type=int, default=MIN_TOKENS, help='minimum number of words accepted as a match')
-    parser.add_argument('--rasm', action='store_true', help='accept pure rasm matches')
-    parser.add_argument('--ellipses', action='store_true', help='include ellipses')
-    parser.add_argument('--quiet', action='store_true', help='do not indicate as attributes the quran indexes matched in the xml tag')
-    parser.add_argument('--debug', action='store_true', help='show debugging info')
-    args = parser.parse_args()
+    tok_text = doc_text.split()
+    del doc_text
 
-    doc = json.load(args.infile)
+    tagged = []
 
-    text = doc['text']
-    text = text[1:] #FIXME bug: the initial space should not be there
-    for ann in doc['annotation']['aya'][::-1]:
-        text = text[:ann['end']] + "\n</quran>\n" + text[ann['end']:]
-        text = text[:ann['start']] + "\n<quran>\n" + text[ann['start']:]
+    if debug:
+        tagged.append('\n====== results ======\n') #TRACE
 
-    text = REGEX_COMPLETE_TAGS.sub(r'\n<quran>\n\1\n</quran>\n', text)
+    # the attributes of the tags are only built if they are shown
+    opening_tags = {}
+    closing_tags = set()
+    for tinds, qinds in tagger(tok_text, min_tokens=min_tokens, rasm_match=rasm_match, include_ellipses=include_ellipses, debug=debug):
+        attrib = None
+        if debug or not quiet:
+            attrib = '; '.join(f'ini={":".join(map(str,qiini))} end={":".join(map(str,qiend))}' for qiini, qiend, *_ in qinds)
+        if debug:
+            tagged.append(f'{(tinds, attrib)}\n') #TRACE
+        opening_tags[tinds[0]] = attrib
+        closing_tags.add(tinds[1])
 
-    # text with annotations from altafsir
-    print(text, file=args.gold)
+    if debug:
+        tagged.append('\n====== tagged tok_text ======\n') #TRACE
 
-    tok_text = [w for w in doc['text'].split()]
+    for i, tok in enumerate(tok_text):
+        if i in opening_tags:
+            tagged.append(f'\n<quran{"" if quiet else " "+opening_tags[i]}>\n{tok} ')
+        elif i in closing_tags:
+            tagged.append(f'{tok}\n</quran>\n')
+        else:
+            tagged.append(f'{tok} ')
 
-    results = list(tagger(tok_text, min_tokens=args.min, rasm_match=args.rasm, include_ellipses=args.ellipses, debug=args.debug))
+    return gold, ''.join(tagged)
 
-    results_proc = [(tinds, '; '.join(f'ini={":".join(map(str,qiini))} end={":".join(map(str,qiend))}' for qiini, qiend, *_ in qinds))
-        for tinds, qinds in results]
+def tag_altafsir_file(path, **kwargs):
+    """ tag altafsir file according to its gold standard annotation and to the quran tagger.
 
-    if args.debug:
-        print('\n====== results ======', file=args.outfile) #TRACE
-        for res in results_proc:
-            print(res, file=args.outfile) #TRACE
+    Args:
+        path (str): path to altafsir json file.
+        kwargs: arguments of tag_altafsir.
 
-    opening_tags = {ini:attrib for (ini, _), attrib in results_proc}
-    closing_tags = {end for (_, end), _ in results_proc}
+    Return:
+        str, str: text tagged according to the gold standard, text tagged according to the quran tagger.
 
-    if args.debug:
-        print('\n====== tagged tok_text ======', file=args.outfile) #TRACE
+    """
+    with open(path) as fp:
+        return tag_altafsir(load_json(fp), **kwargs)
 
-    for i, tok in enumerate(tok_text):
-        if i in opening_tags:
-            print(f'\n<quran{"" if args.quiet else " "+opening_tags[i]}>\n{tok} ', end='', file=args.outfile)
-        elif i in closing_tags:
-            print(f'{tok}\n</quran>\n', end='', file=args.outfile)
-        else:
-            print(tok, end=' ', file=args.outfile)
 
+if __name__ == '__main__':
+
+    parser = ArgumentParser(description='manual test for quranic tagger')
+    parser.add_argument('infile', nargs='?', type=FileType('r'), default=sys.stdin, help='altafsir file')
+    parser.add_argument('outfile', nargs='?', type=FileType('w'), default=sys.stdout, help='tagged text according to quran tagger')
+    parser.add_argument('--gold', type=FileType('w'), help='tagged text according to gold standard')
+    parser.add_argument('--min', type=int, default=MIN_TOKENS, help='minimum number of words accepted as a match')
+    parser.add_argument('--rasm', action='store_true', help='accept pure rasm matches')
+    parser.add_argument('--ellipses', action='store_true', help='include ellipses')
+    parser.add_argument('--quiet', action='store_true', help='do not indicate as attributes the quran indexes matched in the xml tag')
+    parser.add_argument('--batch', action='store_true', help='infile contains a list of altafsir files to tag, one path per line')
+    parser.add_argument('--jobs', type=int, default=1, help='number of worker processes to tag the files of --batch with (0 for all cpus) [DEFAULT = 1]')
+    parser.add_argument('--debug', action='store_true', help='show debugging info')
+    args = parser.parse_args()
 
+    kwargs = dict(min_tokens=args.min, rasm_match=args.rasm, include_ellipses=args.ellipses, quiet=args.quiet, debug=args.debug)
+
+    if args.batch:
+        inpaths = [l.strip() for l in args.infile if l.strip()]
+        # with a single job the files are tagged in this process, without sending them to a worker
+        tag = partial(tag_altafsir_file, **kwargs)
+        with ProcessPoolExecutor(max_workers=args.jobs or None) if args.jobs != 1 else nullcontext() as executor:
+            for inpath, (gold, tagged) in zip(inpaths, executor.map(tag, inpaths) if executor else map(tag, inpaths)):
+                print(f'File: {inpath}', file=args.gold)
+                print(gold, end='', file=args.gold)
+                print(f'File: {inpath}', file=args.outfile)
+                print(tagged, file=args.outfile)
+
+    else:
+        gold, tagged = tag_altafsir(load_json(args.infile), **kwargs)
+        print(gold, end='', file=args.gold)
+        print(tagged, end='', file=args.outfile)
@@ -14,65 +14,66 @@
 #################################################################################
 
 import unittest
-from argparse import ArgumentParser
 
-from util import normalise, rasm, check_ellipsis
+from util import normalise, rasm, normalise_and_rasm_batch, check_ellipsis, pack_index, last_token_of_sura_or_aya
 
 
 class TestNormalise(unittest.TestCase):
 
-    def test_norm_1(self):
-        self.assertEqual(normalise('بسُرعةِِ'), 'بسرعه')
-
-    def test_norm_2(self):
-        self.assertEqual(normalise('فكّر'), 'فکر')
-
-    def test_norm_3_nun(self):
-        self.assertEqual(normalise('نُۨجِي'), 'ننجی')
-
-    def test_norm_4_nun(self):
-        self.assertEqual(normalise('ٱلۡعَٰلَمِینَ'), 'لعلمین')
-
-    def test_norm_5_conj(self):
-        self.assertEqual(normalise('والماء'), 'ولم')
-
-    def test_norm_6_conj(self):
-        self.assertEqual(normalise('فَالماء'), 'فلم')
-
-    def test_norm_7_conj(self):
-        self.assertEqual(normalise('فِي'), 'فی')
-
-    def test_norm_8_conj(self):
-        self.assertEqual(normalise('ولا'), 'ول')
-
-    def test_norm_9_conj(self):
-        self.assertEqual(normalise('َوَلا'), 'ول')
+    CASES = [
+        ('norm_1', 'بسُرعةِِ', 'بسرعه'),
+        ('norm_2', 'فكّر', 'فکر'),
+        ('norm_3_nun', 'نُۨجِي', 'ننجی'),
+        ('norm_4_nun', 'ٱلۡعَٰلَمِینَ', 'لعلمین'),
+        ('norm_5_conj', 'والماء', 'ولم'),
+        ('norm_6_conj', 'فَالماء', 'فلم'),
+        ('norm_7_conj', 'فِي', 'فی'),
+        ('norm_8_conj', 'ولا', 'ول'),
+        ('norm_9_conj', 'َوَلا', 'ول'),
+    ]
+
+    def test_norm_table(self):
+        for name, inp, exp in self.CASES:
+            with self.subTest(name, inp=inp):
+                self.assertEqual(normalise(inp), exp)
 
 class TestRasm(unittest.TestCase):
 
-    def test_rasm_1(self):
-        self.assertEqual(rasm('بسرعه'), 'BSREH')
-
-    def test_rasm_2_all(self):
-        self.assertEqual(rasm('رزژدذڈوبکلتثپجحخځچسشصضطظعغڡفگمهقنیی'), 'RRRDDDWBKLBBBGGGGGSSCCTTEEFFKMHFBBY')
-
-    def test_rasm_3_NQY(self):
-        self.assertEqual(rasm('قوق'), 'FWQ')
-
-    def test_rasm_4_NQY(self):
-        self.assertEqual(rasm('ننجی'), 'BBGY')
-
-    def test_rasm_5_NQY(self):
-        self.assertEqual(rasm('لعلمین'), 'LELMBN')
-
-    def test_rasm_6(self):
-        self.assertEqual(rasm(normalise("إبراهيم")), "BRHBM")
-
-    def test_rasm_7(self):
-        self.assertEqual(rasm(normalise("ولا")), "WL")
-
-    def test_rasm_8(self):
-        self.assertEqual(rasm(normalise("وَلَا")), "WL")
+    CASES = [
+        ('rasm_1', 'بسرعه', 'BSREH'),
+        ('rasm_2_all', 'رزژدذڈوبکلتثپجحخځچسشصضطظعغڡفگمهقنیی', 'RRRDDDWBKLBBBGGGGGSSCCTTEEFFKMHFBBY'),
+        ('rasm_3_NQY', 'قوق', 'FWQ'),
+        ('rasm_4_NQY', 'ننجی', 'BBGY'),
+        ('rasm_5_NQY', 'لعلمین', 'LELMBN'),
+        ('rasm_9_empty', '', ''),
+        ('rasm_10_NQY_single', 'ن', 'N'),
+    ]
+
+    # rasm of the normalised text
+    NORM_CASES = [
+        ('rasm_6', "إبراهيم", "BRHBM"),
+        ('rasm_7', "ولا", "WL"),
+        ('rasm_8', "وَلَا", "WL"),
+    ]
+
+    def test_rasm_table(self):
+        for name, inp, exp in self.CASES:
+            with self.subTest(name, inp=inp):
+                self.assertEqual(rasm(inp), exp)
+
+    def test_rasm_norm_table(self):
+        for name, inp, exp in self.NORM_CASES:
+            with self.subTest(name, inp=inp):
+                self.assertEqual(rasm(normalise(inp)), exp)
+
+class TestNormalise_and_rasm_batch(unittest.TestCase):
+
+    def test_normalise_and_rasm_batch_1(self):
+        self.assertEqual(normalise_and_rasm_batch(['بسُرعةِِ', 'ننجی']), [('بسُرعةِِ', 'بسرعه', 'BSREH'), ('ننجی', 'ننجی', 'BBGY')])
+
+    def test_normalise_and_rasm_batch_2_fields(self):
+        word = normalise_and_rasm_batch(['بسُرعةِِ'])[0]
+        self.assertEqual((word.ori, word.norm, word.rasm), ('بسُرعةِِ', 'بسرعه', 'BSREH'))
 
 #class TestEqual(unittest.TestCase):
 #
@@ -103,365 +104,70 @@ class TestRasm(unittest.TestCase):
 
 class TestCheck_ellipsis(unittest.TestCase):
 
-    def test_check_ellipsis_01(self):
-        s = "سسسس صصصص ظظظظظ السورة كلها"
-        words = s.split(" ")
-        words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-        exp = "al_sura kullaha"
-        r = check_ellipsis(words_rasm, 3)
-        print(r)
-        self.assertEqual(r, exp)
-
-    def test_check_ellipsis_02(self):
-        s = "سسسس صصصص ظظظظظ الآية كلها"
-        words = s.split(" ")
-        words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-        exp = "al_aya kullaha"
-        r = check_ellipsis(words_rasm, 3)
-        print(r)
-        self.assertEqual(r, exp)
-
-    def test_check_ellipsis_03(self):
-        s = "سسسس صصصص ظظظظظ الخ شششش"
-        words = s.split(" ")
-        words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-        exp = "ila end_noun_ha"
-        r = check_ellipsis(words_rasm, 3)
-        print(r)
-        self.assertEqual(r, exp)
-
-    def test_check_ellipsis_04(self):
-        s = "سسسس صصصص ظظظظظ حتى تمامها شششش"
-        words = s.split(" ")
-        words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-        exp = "hatta end_noun_ha"
-        r = check_ellipsis(words_rasm, 3)
-        print(r)
-        self.assertEqual(r, exp)
-
-    def test_check_ellipsis_05(self):
-        s = "سسسس صصصص ظظظظظ حتى خاتمتها شششش"
-        words = s.split(" ")
-        words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-        exp = "hatta end_noun_ha"
-        r = check_ellipsis(words_rasm, 3)
-        print(r)
-        self.assertEqual(r, exp)
-
-    def test_check_ellipsis_06(self):
-        s = "سسسس صصصص ظظظظظ حتى خاتمة الآية شششش"
-        words = s.split(" ")
-        words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-        exp = "hatta end_noun al_aya"
-        r = check_ellipsis(words_rasm, 3)
-        print(r)
-        self.assertEqual(r, exp)
-
-    def test_check_ellipsis_07(self):
-        s = "سسسس صصصص ظظظظظ حتى خاتمة السورة كلها شششش"
-        words = s.split(" ")
-        words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-        exp = "hatta end_noun al_sura kullaha"
-        r = check_ellipsis(words_rasm, 3)
-        print(r)
-        self.assertEqual(r, exp)
-
-    def test_check_ellipsis_08(self):
-        s = "سسسس صصصص ظظظظظ حتى خاتمة سورة البقرة شششش"
-        words = s.split(" ")
-        words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-        exp = "hatta end_noun surat sura_name1"
-        r = check_ellipsis(words_rasm, 3)
-        print(r)
-        self.assertEqual(r, exp)
-
-    def test_check_ellipsis_09(self):
-        s = "سسسس صصصص ظظظظظ حتى خاتمة الفاتحة شششش"
-        words = s.split(" ")
-        words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-        exp = "hatta end_noun sura_name1"
-        r = check_ellipsis(words_rasm, 3)
-        print(r)
-        self.assertEqual(r, exp)
-
-    def test_check_ellipsis_10(self):
-        s = "سسسس صصصص ظظظظظ حتى خاتمة أم القرآن شششش"
-        words = s.split(" ")
-        words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-        exp = "hatta end_noun sura_name1 sura_name2"
-        r = check_ellipsis(words_rasm, 3)
-        print(r)
-        self.assertEqual(r, exp)
-
-    def test_check_ellipsis_11(self):
-        print(11)
-        s = "سسسس صصصص ظظظظظ حتى ختمها شششش"  # problem: khātimatun and khātamahā have the same rasm: GBMH; but no problem!
-        s = "سسسس صصصص ظظظظظ حتى تختمها شششش"
-        words = s.split(" ")
-        words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-        exp = "hatta end_verb_ha"
-        r = check_ellipsis(words_rasm, 3)
-        print(" ".join([x[2] for x in words_rasm]))
-        print(r)
-        self.assertEqual(r, exp)
+    # every case is preceded by the same three filler words, the ellipsis is looked for after them
+    PREFIX_WORDS_RASM = normalise_and_rasm_batch("سسسس صصصص ظظظظظ".split(" "))
+
+    # texts are split once, when the class is defined
+    CASES = [(name, tuple(s.split(" ")), exp) for name, s, exp in [
+        ('check_ellipsis_01', "السورة كلها", "al_sura kullaha"),
+        ('check_ellipsis_02', "الآية كلها", "al_aya kullaha"),
+        ('check_ellipsis_03', "الخ شششش", "ila end_noun_ha"),
+        ('check_ellipsis_04', "حتى تمامها شششش", "hatta end_noun_ha"),
+        ('check_ellipsis_05', "حتى خاتمتها شششش", "hatta end_noun_ha"),
+        ('check_ellipsis_06', "حتى خاتمة الآية شششش", "hatta end_noun al_aya"),
+        ('check_ellipsis_07', "حتى خاتمة السورة كلها شششش", "hatta end_noun al_sura kullaha"),
+        ('check_ellipsis_08', "حتى خاتمة سورة البقرة شششش", "hatta end_noun surat sura_name1"),
+        ('check_ellipsis_09', "حتى خاتمة الفاتحة شششش", "hatta end_noun sura_name1"),
+        ('check_ellipsis_10', "حتى خاتمة أم القرآن شششش", "hatta end_noun sura_name1 sura_name2"),
+        # problem: khātimatun and khātamahā have the same rasm: GBMH (e.g. "حتى ختمها"); but no problem!
+        ('check_ellipsis_11', "حتى تختمها شششش", "hatta end_verb_ha"),
+        ('check_ellipsis_12', "إلى أن تختمها شششش", "ila an end_verb_ha"),
+        ('check_ellipsis_13', "إلى أن فرغ منها شششش", "ila an end_verb min_ha"),
+        ('check_ellipsis_14', "حتى فرغت منها شششش", "hatta end_verb min_ha"),
+        ('check_ellipsis_15', "حتى فرغت من الآية شششش", "hatta end_verb min al_aya"),
+        ('check_ellipsis_16', "إلى أن فرغت من الآية كلها شششش", "ila an end_verb min al_aya kullaha"),
+        ('check_ellipsis_17', "إلى أن تنقضي السورة كلها شششش", "ila an end_verb al_sura kullaha"),
+        ('check_ellipsis_18', "إلى أن تنقضي سورة البقرة شششش", "ila an end_verb surat sura_name1"),
+        ('check_ellipsis_19', "إلى أن تنقضي أم القرآن شششش", "ila an end_verb sura_name1 sura_name2"),
+        ('check_ellipsis_20', "إلى أن تنقضي آخرها شششش", "ila an end_verb end_noun_ha"),
+        ('check_ellipsis_21', "إلى أن ختمت شششش", "ila an end_verb"),
+        ('check_ellipsis_22', "إلى أن قرأ شششش", "ila an speech_verb"),
+        ('check_ellipsis_23', "حتى قال شششش", "hatta speech_verb"),
+        ('check_ellipsis_24', "حتى انتهى الى شششش", "hatta to_verb ila"),
+        ('check_ellipsis_25', "إلى أن أتى على الآية شششش", "ila an to_verb cala al_aya"),
+        ('check_ellipsis_26', "إلى قوله شششش", "ila qawlihi"),
+        ('check_ellipsis_27', "إلى قوله تعالى شششش", "ila qawlihi GOD"),
+        ('check_ellipsis_28', "إلى قول تعالى شششش", "ila qawl GOD"),
+        ('check_ellipsis_29', "إلى قوله عز وجل شششش", "ila qawlihi GOD wa_GOD"),
+        ('check_ellipsis_30', "إلى قوله عز شأنه وجل ذكره شششش", "ila qawlihi GOD GOD_attribute wa_GOD GOD_attribute"),
+        ('check_ellipsis_31', "إلى قول جعفر شششش", "ila"),
+        ('check_ellipsis_32', "إلى أن فعل شششش", "ila"),
+        ('check_ellipsis_33', "الآية شششش", False),
+        ('check_ellipsis_34', "الآية إلى آخر الآيات شششش", "al_aya ila end_noun al_sura"),
+    ]]
+
+    def test_check_ellipsis_table(self):
+        for name, words, exp in self.CASES:
+            with self.subTest(name, words=words):
+                words_rasm = self.PREFIX_WORDS_RASM + normalise_and_rasm_batch(words)
+                self.assertEqual(check_ellipsis(words_rasm, 3), exp)
+
+
+class TestLast_token_of_sura_or_aya(unittest.TestCase):
+
+    QPACKED = [pack_index(*index) for index in [(1, 1, 1), (1, 1, 2), (1, 2, 1), (1, 2, 2), (1, 2, 3), (2, 1, 1), (2, 1, 2)]]
+
+    def test_last_token_aya_1(self):
+        self.assertEqual(last_token_of_sura_or_aya(self.QPACKED, 2, "aya"), 4)
+
+    def test_last_token_aya_2_last_of_quran(self):
+        self.assertEqual(last_token_of_sura_or_aya(self.QPACKED, 5, "aya"), 6)
+
+    def test_last_token_sura_1(self):
+        self.assertEqual(last_token_of_sura_or_aya(self.QPACKED, 0, "sura"), 4)
+
+    def test_last_token_sura_2_already_last(self):
+        self.assertEqual(last_token_of_sura_or_aya(self.QPACKED, 4, "sura"), 4)
 
-    def test_check_ellipsis_12(self):
-        print(12)
-        s = "سسسس صصصص ظظظظظ إلى أن تختمها شششش"
-        words = s.split(" ")
-        words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-        exp = "ila an end_verb_ha"
-        r = check_ellipsis(words_rasm, 3)
-        print(" ".join([x[2] for x in words_rasm]))
-        print(r)
-        self.assertEqual(r, exp)
-
-    def test_check_ellipsis_13(self):
-        print(13)
-        s = "سسسس صصصص ظظظظظ إلى أن فرغ منها شششش"
-        words = s.split(" ")
-        words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-        exp = "ila an end_verb min_ha"
-        r = check_ellipsis(words_rasm, 3)
-        print(" ".join([x[2] for x in words_rasm]))
-        print(r)
-        self.assertEqual(r, exp)
-
-    def test_check_ellipsis_14(self):
-        print(14)
-        s = "سسسس صصصص ظظظظظ حتى فرغت منها شششش"
-        words = s.split(" ")
-        words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-        exp = "hatta end_verb min_ha"
-        r = check_ellipsis(words_rasm, 3)
-        print(" ".join([x[2] for x in words_rasm]))
-        print(r)
-        self.assertEqual(r, exp)
-
-    def test_check_ellipsis_15(self):
-        print(15)
-        s = "سسسس صصصص ظظظظظ حتى فرغت من الآية شششش"
-        words = s.split(" ")
-        words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-        exp = "hatta end_verb min al_aya"
-        r = check_ellipsis(words_rasm, 3)
-        print(" ".join([x[2] for x in words_rasm]))
-        print(r)
-        self.assertEqual(r, exp)
-
-    def test_check_ellipsis_16(self):
-        print(16)
-        s = "سسسس صصصص ظظظظظ إلى أن فرغت من الآية كلها شششش"
-        words = s.split(" ")
-        words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-        exp = "ila an end_verb min al_aya kullaha"
-        r = check_ellipsis(words_rasm, 3)
-        print(" ".join([x[2] for x in words_rasm]))
-        print(r)
-        self.assertEqual(r, exp)
-
-    def test_check_ellipsis_17(self):
-        print(17)
-        s = "سسسس صصصص ظظظظظ إلى أن تنقضي السورة كلها شششش"
-        words = s.split(" ")
-        words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-        exp = "ila an end_verb al_sura kullaha"
-        r = check_ellipsis(words_rasm, 3)
-        print(" ".join([x[2] for x in words_rasm]))
-        print(r)
-        self.assertEqual(r, exp)
-
-    def test_check_ellipsis_18(self):
-        print(18)
-        s = "سسسس صصصص ظظظظظ إلى أن تنقضي سورة البقرة شششش"
-        words = s.split(" ")
-        words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-        exp = "ila an end_verb surat sura_name1"
-        r = check_ellipsis(words_rasm, 3)
-        print(" ".join([x[2] for x in words_rasm]))
-        print(r)
-        self.assertEqual(r, exp)
-
-    def test_check_ellipsis_19(self):
-        print(19)
-        s = "سسسس صصصص ظظظظظ إلى أن تنقضي أم القرآن شششش"
-        words = s.split(" ")
-        words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-        exp = "ila an end_verb sura_name1 sura_name2"
-        r = check_ellipsis(words_rasm, 3)
-        print(" ".join([x[2] for x in words_rasm]))
-        print(r)
-        self.assertEqual(r, exp)
-
-    def test_check_ellipsis_20(self):
-        print(20)
-        s = "سسسس صصصص ظظظظظ إلى أن تنقضي آخرها شششش"
-        words = s.split(" ")
-        words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-        exp = "ila an end_verb end_noun_ha"
-        r = check_ellipsis(words_rasm, 3)
-        print(" ".join([x[2] for x in words_rasm]))
-        print(r)
-        self.assertEqual(r, exp)
-
-
-    def test_check_ellipsis_21(self):
-        print(21)
-        s = "سسسس صصصص ظظظظظ إلى أن ختمت شششش"
-        words = s.split(" ")
-        words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-        exp = "ila an end_verb"
-        r = check_ellipsis(words_rasm, 3)
-        print(" ".join([x[2] for x in words_rasm]))
-        print(r)
-        self.assertEqual(r, exp)
-
-    def test_check_ellipsis_22(self):
-        print(22)
-        s = "سسسس صصصص ظظظظظ إلى أن قرأ شششش"
-        words = s.split(" ")
-        words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-        exp = "ila an speech_verb"
-        r = check_ellipsis(words_rasm, 3)
-        print(" ".join([x[2] for x in words_rasm]))
-        print(r)
-        self.assertEqual(r, exp)
-
-    def test_check_ellipsis_23(self):
-        print(23)
-        s = "سسسس صصصص ظظظظظ حتى قال شششش"
-        words = s.split(" ")
-        words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-        exp = "hatta speech_verb"
-        r = check_ellipsis(words_rasm, 3)
-        print(" ".join([x[2] for x in words_rasm]))
-        print(r)
-        self.assertEqual(r, exp)
-
-    def test_check_ellipsis_24(self):
-        print(24)
-        s = "سسسس صصصص ظظظظظ حتى انتهى الى شششش"
-        words = s.split(" ")
-        words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-        exp = "hatta to_verb ila"
-        r = check_ellipsis(words_rasm, 3)
-        print(" ".join([x[2] for x in words_rasm]))
-        print(r)
-        self.assertEqual(r, exp)
-
-    def test_check_ellipsis_25(self):
-        print(25)
-        s = "سسسس صصصص ظظظظظ إلى أن أتى على الآية شششش"
-        words = s.split(" ")
-        words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-        exp = "ila an to_verb cala al_aya"
-        r = check_ellipsis(words_rasm, 3)
-        print(" ".join([x[2] for x in words_rasm]))
-        print(r)
-        self.assertEqual(r, exp)
-
-    def test_check_ellipsis_26(self):
-        print(26)
-        s = "سسسس صصصص ظظظظظ إلى قوله شششش"
-        words = s.split(" ")
-        words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-        exp = "ila qawlihi"
-        r = check_ellipsis(words_rasm, 3)
-        print(" ".join([x[2] for x in words_rasm]))
-        print(r)
-        self.assertEqual(r, exp)
-
-    def test_check_ellipsis_27(self):
-        print(27)
-        s = "سسسس صصصص ظظظظظ إلى قوله تعالى شششش"
-        words = s.split(" ")
-        words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-        exp = "ila qawlihi GOD"
-        r = check_ellipsis(words_rasm, 3)
-        print(" ".join([x[2] for x in words_rasm]))
-        print(r)
-        self.assertEqual(r, exp)
-
-    def test_check_ellipsis_28(self):
-        print(28)
-        s = "سسسس صصصص ظظظظظ إلى قول تعالى شششش"
-        words = s.split(" ")
-        words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-        exp = "ila qawl GOD"
-        r = check_ellipsis(words_rasm, 3)
-        print(" ".join([x[2] for x in words_rasm]))
-        print(r)
-        self.assertEqual(r, exp)
-
-    def test_check_ellipsis_29(self):
-        print(29)
-        s = "سسسس صصصص ظظظظظ إلى قوله عز وجل شششش"
-        words = s.split(" ")
-        words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-        exp = "ila qawlihi GOD wa_GOD"
-        r = check_ellipsis(words_rasm, 3)
-        print(" ".join([x[2] for x in words_rasm]))
-        print(r)
-        self.assertEqual(r, exp)
-
-    def test_check_ellipsis_30(self):
-        print(30)
-        s = "سسسس صصصص ظظظظظ إلى قوله عز شأنه وجل ذكره شششش"
-        words = s.split(" ")
-        words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-        exp = "ila qawlihi GOD GOD_attribute wa_GOD GOD_attribute"
-        r = check_ellipsis(words_rasm, 3)
-        print(" ".join([x[2] for x in words_rasm]))
-        print(r)
-        self.assertEqual(r, exp)
-
-    def test_check_ellipsis_31(self):
-        print(31)
-        s = "سسسس صصصص ظظظظظ إلى قول جعفر شششش"
-        words = s.split(" ")
-        words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-        exp = "ila"
-        r = check_ellipsis(words_rasm, 3)
-        print(" ".join([x[2] for x in words_rasm]))
-        print(r)
-        self.assertEqual(r, exp)
-
-    def test_check_ellipsis_32(self):
-        print(32)
-        s = "سسسس صصصص ظظظظظ إلى أن فعل شششش"
-        words = s.split(" ")
-        words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-        exp = "ila"
-        r = check_ellipsis(words_rasm, 3)
-        print(" ".join([x[2] for x in words_rasm]))
-        print(r)
-        self.assertEqual(r, exp)
-
-    def test_check_ellipsis_33(self):
-        print(33)
-        s = "سسسس صصصص ظظظظظ الآية شششش"
-        words = s.split(" ")
-        words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-        exp = False
-        r = check_ellipsis(words_rasm, 3)
-        print(" ".join([x[2] for x in words_rasm]))
-        print(r)
-        self.assertEqual(r, exp)
-
-    def test_check_ellipsis_34(self):
-        print(34)
-        s = "سسسس صصصص ظظظظظ الآية إلى آخر الآيات شششش"
-        words = s.split(" ")
-        words_rasm = [(ori, norm, rasm(norm)) for ori, norm in ((w, normalise(w)) for w in words)]
-        exp = "al_aya ila end_noun al_sura"
-        r = check_ellipsis(words_rasm, 3)
-        print(" ".join([x[2] for x in words_rasm]))
-        print(r)
-        self.assertEqual(r, exp)
-        
 if __name__ == '__main__':
-
-    parser = ArgumentParser(description='apply all tests for util')
-    args = parser.parse_args()
-
     unittest.main()
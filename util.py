@@ -20,7 +20,10 @@
 import re
 import sys
 import textwrap
+from bisect import bisect_right
+from functools import lru_cache
 from itertools import groupby
+from typing import NamedTuple
 from argparse import ArgumentParser, FileType
 
 try:
@@ -104,11 +107,19 @@ GRAPHEMES = "".join(RASM_MAPPING.keys())
 VOWELS = 'ًٌٍَُِ'
 #VOWELS = 'ًࣰٌࣱٍࣲَُِّْۣۭۡٓۜۢ۟۠ۖۗۘۙۚۛ'
 
-NORM_REGEX = re.compile('|'.join(NORM_MAPPING))
-CLEAN_REGEX = re.compile(f'[^{GRAPHEMES}]')
+class _NormTable(dict):
+    """ translation table that maps each character to its normalised form, or drops it
+    if it is not an Arabic grapheme. Entries are filled in the first time a codepoint is seen.
 
-RASM_REGEX = re.compile('|'.join(RASM_MAPPING))
-QNY_RASM_REGEX = re.compile('(%s)(?=$)' % '|'.join(QNY_RASM_MAPPING))
+    """
+    def __missing__(self, cp):
+        c = NORM_MAPPING.get(chr(cp), chr(cp))
+        self[cp] = c if c in GRAPHEMES else None
+        return self[cp]
+
+NORM_TABLE = _NormTable()
+
+RASM_TABLE = str.maketrans(RASM_MAPPING)
 
 def prepare_quran(quranfp):
     """ prepare preprocessed tanzil quran for the quran tagger.
@@ -166,7 +177,7 @@ def prepare_quran(quranfp):
             word_rasm = rasm(word_norm)
 
             qtext.append(((isura, ivers, iword), (word, word_norm)))
-            qrasm[word_rasm] = qrasm.get(word_rasm, [])+[i:=i+1]
+            qrasm.setdefault(word_rasm, []).append(i:=i+1)
 
             if isura != prev_isura:
                 for sn in [k for k, v in sura_names.items() if v == prev_isura]:
@@ -195,17 +206,17 @@ def prepare_stopwords(quranfp):
         token_norm = normalise(token)
         token_rasm = rasm(token_norm)
         pos_list = tuple(g['POS'] for g in group)
-        quran_words[pos_list] = quran_words.get(pos_list, set()).union({(token_rasm, token_norm)})
+        quran_words.setdefault(pos_list, set()).add((token_rasm, token_norm))
 
     rasm_norm_words = set()
     for pos_list, norm_words in quran_words.items():
         if pos_list in (('PRON',), ('REL',), ('NEG',), ('P',), ('CONJ',), ('SUB',), ('INTG',), ('AVR',), ('CONJ', 'PRON'), ('P', 'PRON'), ('CONJ', 'NEG'),
             ('CONJ', 'REL'), ('P', 'REL'), ('CONJ', 'P'), ('REM', 'P', 'REL'), ('SUP', 'AMD'), ('REM', 'COND'), ('INTG', 'T')):
-            rasm_norm_words = rasm_norm_words.union(norm_words)
+            rasm_norm_words.update(norm_words)
 
     stopwords = {}
     for rasm_tok, norm_tok in sorted(rasm_norm_words, key=lambda x: len(x[0])):
-        stopwords[rasm_tok] = stopwords.get(rasm_tok, set()).union((norm_tok,))
+        stopwords.setdefault(rasm_tok, set()).add(norm_tok)
 
     #for rasm_tok, norm_list in stopwords.items():
     #    print(rasm_tok, norm_list)
@@ -215,6 +226,7 @@ def prepare_stopwords(quranfp):
 
     return stopwords
 
+@lru_cache(maxsize=65536)
 def normalise(s, rm_conj=True):
     """ normalise Arabic script.
 
@@ -227,12 +239,12 @@ def normalise(s, rm_conj=True):
         str: normalised text.
 
     """
-    s = NORM_REGEX.sub(lambda m: NORM_MAPPING[m.group(0)], s)
-    s = CLEAN_REGEX.sub('', s)
+    s = s.translate(NORM_TABLE) # alif is not a grapheme, so it is dropped here as well
     if rm_conj and len(s)>1 and (s[0]=='و' or s[0]=='ف'):
         s = s[1:]
-    return s.replace('ا', '')
+    return s
 
+@lru_cache(maxsize=65536)
 def rasm(s):
     """ convert s to archigraphemic representation.
 
@@ -243,8 +255,48 @@ def rasm(s):
         s: rasmised text.
 
     """
-    s = QNY_RASM_REGEX.sub(lambda m: QNY_RASM_MAPPING[m.group(0)], s)
-    return RASM_REGEX.sub(lambda m: RASM_MAPPING[m.group(0)], s)
+    # qaf, nun and ya have a distinct archigrapheme at the end of the word
+    if s and s[-1] in QNY_RASM_MAPPING:
+        r = s[:-1].translate(RASM_TABLE) + QNY_RASM_MAPPING[s[-1]]
+    else:
+        r = s.translate(RASM_TABLE)
+
+    # interned, so that comparing rasms with the word lists of check_ellipsis is mostly an identity check
+    return sys.intern(r)
+
+class WordRasm(NamedTuple):
+    """ word of a text with its normalised and rasmised forms, as used by tagger and check_ellipsis.
+
+    """
+    ori: str
+    norm: str
+    rasm: str
+
+@lru_cache(maxsize=65536)
+def _word_rasm(word):
+    """ normalise and rasmise a word, caching the result as words repeat a lot in a text.
+
+    Args:
+        word (str): word to convert.
+
+    Return:
+        WordRasm: original, normalised and rasmised forms of word. It is shared between calls.
+
+    """
+    norm = normalise(word)
+    return WordRasm(word, norm, rasm(norm))
+
+def normalise_and_rasm_batch(words):
+    """ normalise and rasmise a list of words.
+
+    Args:
+        words (iterable): words to convert.
+
+    Return:
+        list: WordRasm (original, normalised, rasmised) tuple of each word.
+
+    """
+    return [_word_rasm(w) for w in words]
     
 
 AL_SURA = [rasm(normalise(el)) for el in ["السورة", "الآيات"]]  #  , "الآي"]]
@@ -288,6 +340,8 @@ ILA = rasm(normalise("إلى"))
 speech_verbs = "قال,قالت,قلت,قرأ,قرأت".split(",")
 SPEECH_VERB = [rasm(normalise(el)) for el in speech_verbs]
 
+ILA_HATTA_REGEX = re.compile('ila|hatta')
+
 
 def check_ellipsis(words_rasm, i, size=None, debug=False):
     """Check whether the Quran quotation is an elliptical quotation
@@ -488,35 +542,39 @@ def check_ellipsis(words_rasm, i, size=None, debug=False):
                                     break
                     if not ell.endswith("qawl "):
                         return ell.strip()
-        try:
-            return re.findall("ila|hatta", ell)[0]
-        except:
-            return False
+        match = ILA_HATTA_REGEX.search(ell)
+        return match.group() if match else False
     except IndexError:
         return False
 
-def last_token_of_sura_or_aya(qtext, start, n, n_type):
+def pack_index(sura, aya, word):
+    """ pack a quran index into a single int that sorts in quran order.
+
+    Args:
+        sura (int): sura number.
+        aya (int): aya number.
+        word (int): word number within the aya.
+
+    Return:
+        int: packed index.
+
+    """
+    return (sura << 20) | (aya << 10) | word
+
+def last_token_of_sura_or_aya(qpacked, start, n_type):
     """Find the end of a sura or verse.
 
     Args:
-        qtext (list): list that contains for every token in the Quran
-            two tuples: ((token, normalized_token), (sura_no, aya_no, word_no))
+        qpacked (list): packed index (see pack_index) of every token in the Quran, in Quran order
         start (int): token index of a token in the verse
-        n (int): aya or sura number
         n_type (str): "aya" or "sura"
         
     Returns:
         int : (zero-based) token index of the last token in the current sura/aya in the Quran
     """
-    t = {"sura": 0, "aya": 1}[n_type]
-    i = 0
-    end = False
-    size = len(qtext)
-    while not end and qtext[start+i][0][t] == n:
-        i += 1
-        if start + i == size:
-            end = True
-    return start + i - 1
+    # last possible packed index of the sura/aya of start
+    last = qpacked[start] | {"sura": (1 << 20) - 1, "aya": (1 << 10) - 1}[n_type]
+    return bisect_right(qpacked, last, start) - 1
 
 if __name__ == '__main__':
 